@@ -181,8 +181,24 @@ divide_numbers(10, "2")  # TypeError
 # Absolutely! Let’s play around with some interactive and fun Python examples to really get how exception
 # handling works. Feel free to tweak them or run them in your local environment to see what happens. 
 # I’ll guide you through the logic too.
-class TooYoungError(Exception):
-    pass
+class ValidationError(Exception):
+    """
+    Base class for this lesson's validation errors.
+    The message is kept only in what Exception already stores (args); `message` reads it from
+    there and falls back to the class's `default_message`.
+    """
+    default_message = "Validation failed."
+
+    @property
+    def message(self):
+        return self.args[0] if self.args else self.default_message
+
+    def __str__(self) -> str:
+        return str(self.message)
+
+
+class TooYoungError(ValidationError):
+    default_message = "You're too young to register!"
 
 def check_age(age):
     try:
@@ -309,77 +325,233 @@ if not results:
 # prompt: generate a learning code on error handling covering all the expects
 
 import random
-from typing import Tuple, List
+from array import array
+from itertools import compress
+from operator import truediv
+from typing import Tuple, List, Union
 
-def generate_random_data(num_samples: int) -> List[Tuple[int, int]]:
+ENGINES = ("list", "numpy", "table", "compact")
+
+# Where the data pipeline below reports its errors. None prints each line right away; assign an
+# ErrorSink (see "Buffered Error Sink" at the end) to make reporting cheap under high error rates.
+error_sink = None
+
+
+def report_error(message: str) -> None:
+    """Sends one error line to `error_sink`, or prints it if no sink is installed."""
+    if error_sink is None:
+        print(message)
+    else:
+        error_sink.emit(message)
+
+
+class PairArray:
+    """
+    Compact (numerator, denominator) pairs: two typed arrays instead of a list of tuples.
+    With the default typecode 'B' a pair costs 2 bytes instead of a tuple plus a list slot.
+    Iterating and indexing give tuples, just like the list that generate_random_data returns.
+    """
+    __slots__ = ("numerators", "denominators")
+
+    def __init__(self, numerators=(), denominators=(), typecode: str = "B"):
+        self.numerators = array(typecode, numerators)
+        self.denominators = array(typecode, denominators)
+        if len(self.numerators) != len(self.denominators):
+            raise ValueError("❌ numerators and denominators must have the same length.")
+
+    @classmethod
+    def from_pairs(cls, pairs, typecode: str = "B") -> "PairArray":
+        numerators, denominators = zip(*pairs) if pairs else ((), ())
+        return cls(numerators, denominators, typecode)
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self.numerators) * self.numerators.itemsize
+                + len(self.denominators) * self.denominators.itemsize)
+
+    def __len__(self) -> int:
+        return len(self.numerators)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PairArray(self.numerators[index], self.denominators[index], self.numerators.typecode)
+        return self.numerators[index], self.denominators[index]
+
+    def __iter__(self):
+        return zip(self.numerators, self.denominators)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PairArray):
+            return self.numerators == other.numerators and self.denominators == other.denominators
+        return list(self) == other
+
+    def __repr__(self) -> str:
+        return f"PairArray({len(self)} pairs, {self.nbytes} bytes)"
+
+    def tolist(self) -> List[Tuple[int, int]]:
+        return list(self)
+
+    def to_numpy(self):
+        """(numerators, denominators) as NumPy arrays sharing this container's memory."""
+        _require_numpy()
+        return np.frombuffer(self.numerators, dtype=self.numerators.typecode), \
+            np.frombuffer(self.denominators, dtype=self.denominators.typecode)
+
+
+def generate_random_data(num_samples: int, engine: str = "list") -> List[Tuple[int, int]]:
     """
     Generates a list of tuples with random integers.
     Demonstrates ValueError handling and general Exception catching.
+
+    With engine="numpy" the pairs come back as two integer arrays
+    (numerators, denominators) drawn in one batch -- see the NumPy engine below.
+    With engine="compact" they come back as a PairArray (same values, far less memory).
     """
     try:
         if not isinstance(num_samples, int) or num_samples <= 0:
             raise ValueError("❌ 'num_samples' must be a positive integer.")
+
+        if engine == "numpy":
+            return generate_random_arrays(num_samples)
+        if engine == "compact":
+            return generate_compact_pairs(num_samples)
+        if engine not in ENGINES:
+            raise ValueError(f"❌ Unknown engine {engine!r} (use one of {ENGINES}).")
         
         data = [(random.randint(1, 100), random.randint(0, 100)) for _ in range(num_samples)]
         return data
 
     except ValueError as ve:
-        print(f"[ValueError] {ve}")
+        report_error(f"[ValueError] {ve}")
         return []
 
     except Exception as e:
-        print(f"[Unexpected Error] {e}")
+        report_error(f"[Unexpected Error] {e}")
         return []
 
 
-def calculate_ratios(data: List[Tuple[int, int]]) -> List[float]:
+# Error codes used to classify pairs up front, without raising anything per element.
+ERROR_OK = 0              # the pair can be divided
+ERROR_TYPE = 1            # a value in the pair is not an int
+ERROR_ZERO_DIVISION = 2   # the denominator is zero
+ERROR_MALFORMED = 3       # the item is not a pair of two values
+ERROR_NAMES = {ERROR_OK: "OK", ERROR_TYPE: "TypeError", ERROR_ZERO_DIVISION: "ZeroDivisionError",
+               ERROR_MALFORMED: "ValueError"}
+
+
+# byte value -> code: 0 is a zero denominator, anything else is fine
+_DENOMINATOR_CODES = bytes([ERROR_ZERO_DIVISION] + [ERROR_OK] * 255)
+
+
+def classify_pair(pair) -> int:
+    """The ERROR_* code of a single item, which may not even be a pair."""
+    try:
+        num1, num2 = pair
+    except (TypeError, ValueError):
+        return ERROR_MALFORMED
+    if not (isinstance(num1, int) and isinstance(num2, int)):
+        return ERROR_TYPE
+    return ERROR_ZERO_DIVISION if num2 == 0 else ERROR_OK
+
+
+def classify_pairs(data: List[Tuple[int, int]]) -> bytearray:
+    """Returns one ERROR_* code per pair. A type problem wins over a zero denominator."""
+    if isinstance(data, PairArray) and data.denominators.typecode == "B":
+        return bytearray(data.denominators.tobytes().translate(_DENOMINATOR_CODES))  # ints by construction
+    try:
+        return bytearray([ERROR_TYPE if not (isinstance(num1, int) and isinstance(num2, int))
+                          else ERROR_ZERO_DIVISION if num2 == 0
+                          else ERROR_OK
+                          for num1, num2 in data])
+    except (TypeError, ValueError):  # some item doesn't unpack into two values: go one by one
+        return bytearray([classify_pair(pair) for pair in data])
+
+
+def first_error(codes: bytearray) -> int:
+    """Index of the first non-OK code, or len(codes) if every pair is OK."""
+    return len(codes) - len(codes.lstrip(bytes([ERROR_OK])))
+
+
+def raise_for_code(code: int, index: int, pair) -> None:
+    """Turns an error code back into the exception the per-element checks used to raise."""
+    if code == ERROR_MALFORMED:
+        raise ValueError(f"❌ Data at index {index} is not a pair of two values.")
+    if code == ERROR_TYPE:
+        raise TypeError(f"❌ Data at index {index} is not composed of integers.")
+    if code == ERROR_ZERO_DIVISION:
+        raise ZeroDivisionError(f"❌ Cannot divide {pair[0]} by zero at index {index}.")
+
+
+def calculate_ratios(data: List[Tuple[int, int]], engine: str = "list",
+                     partial: bool = False) -> Union[List[float], "RatioResult"]:
     """
     Calculates the ratio of the first to the second element in each tuple.
     Demonstrates handling of ZeroDivisionError, TypeError, and general Exception.
+
+    With engine="numpy" all ratios are computed in one vectorized division,
+    with engine="table" they are looked up in a precomputed RatioTable.
+    A PairArray is accepted as it is by every engine.
+    With partial=True bad pairs are skipped and recorded instead, and the result is always a
+    RatioResult (see below) -- an empty one if the whole call fails.
     """
-    ratios = []
+    failed = empty_ratio_result() if partial else []
 
     try:
-        for i, (num1, num2) in enumerate(data):
-            if not isinstance(num1, int) or not isinstance(num2, int):
-                raise TypeError(f"❌ Data at index {i} is not composed of integers.")
-
-            if num2 == 0:
-                raise ZeroDivisionError(f"❌ Cannot divide {num1} by zero at index {i}.")
-
-            ratio = num1 / num2
-            ratios.append(ratio)
-
+        if partial:
+            return calculate_ratios_partial(data, engine)
+        if engine == "numpy":
+            return ratios_from_vectorized(data)
+        if engine == "table" and not isinstance(data, PairArray):
+            return ratios_from_table(data)  # a PairArray's C-level path below is faster than any table
+        if engine not in ENGINES:
+            raise ValueError(f"❌ Unknown engine {engine!r} (use one of {ENGINES}).")
+
+        # Classify everything first; only the first bad pair (if any) raises.
+        codes = classify_pairs(data)
+        i = first_error(codes)
+        if i < len(codes):
+            raise_for_code(codes[i], i, data[i])
+
+        if isinstance(data, PairArray):
+            return list(map(truediv, data.numerators, data.denominators))
+        ratios = [num1 / num2 for num1, num2 in data]
         return ratios
 
     except ZeroDivisionError as zde:
-        print(f"[ZeroDivisionError] {zde}")
-        return []
+        report_error(f"[ZeroDivisionError] {zde}")
+        return failed
 
     except TypeError as te:
-        print(f"[TypeError] {te}")
-        return []
+        report_error(f"[TypeError] {te}")
+        return failed
+
+    except ValueError as ve:
+        report_error(f"[ValueError] {ve}")
+        return failed
 
     except Exception as e:
-        print(f"[Unexpected Error] {e}")
-        return []
+        report_error(f"[Unexpected Error] {e}")
+        return failed
 
 
-def process_data(num_samples: int) -> List[float]:
+def process_data(num_samples: int, engine: str = "list",
+                 partial: bool = False) -> Union[List[float], "RatioResult"]:
     """
     Combines data generation and ratio calculation.
     Demonstrates chained function calls with error handling.
+    With partial=True it returns a RatioResult (see below) instead of a list.
     """
-    data = generate_random_data(num_samples)
+    data = generate_random_data(num_samples, engine)
 
     if not data:
-        print("🚫 Data generation failed.")
-        return []
+        report_error("🚫 Data generation failed.")
+        return empty_ratio_result() if partial else []
 
-    ratios = calculate_ratios(data)
+    ratios = calculate_ratios(data, engine, partial)
 
-    if not ratios:
-        print("🚫 Ratio calculation failed.")
+    # A RatioResult (a NamedTuple, defined further down) is always truthy: check its ratios instead.
+    if not (ratios.ratios if partial and isinstance(ratios, tuple) else ratios):
+        report_error("🚫 Ratio calculation failed.")
     
     return ratios
 
@@ -526,9 +698,9 @@ print("Program continues...")  # This line will always execute
 
 # Throwing Custom Exceptions🧩 
 # Python also allows you to define custom exceptions by creating a new class that inherits from Exception.
-class NegativeNumberError(Exception):
+class NegativeNumberError(ValidationError):
     """Custom exception for negative numbers"""
-    pass
+    default_message = "Negative numbers are not allowed!"
 
 def check_positive(n):
     if n < 0:
@@ -541,17 +713,15 @@ except NegativeNumberError as e:
     print(f"Custom Exception Caught: {e}", " - Exception Class Type: ", type(e))  # Output: Custom Exception Caught: Negative numbers are not allowed!
 
     # Example
-    # Step 1: Define the Custom Exception
-class NegativeNumberError(Exception):
-    def __init__(self, message="Division by a negative number is not allowed!"):
-        self.message = message
-        super().__init__(self.message)
+    # Step 1: Define the Custom Exception (a more specific kind of NegativeNumberError)
+class NegativeDenominatorError(NegativeNumberError):
+    default_message = "Division by a negative number is not allowed!"
 
 # Step 2: Function to divide with custom exception handling
 def divide(a, b):
     try:
         if b < 0:
-            raise NegativeNumberError()  # Raising our custom exception
+            raise NegativeDenominatorError()  # Raising our custom exception
         if b == 0:
             raise ValueError("Division by zero is not allowed!")  # Built-in exception
         return a / b
@@ -600,6 +770,1200 @@ except SystemExit as e:
     # Alternative to NoReturn in Python
 def log_error(message: str) -> None:
     """Logs an error message but does not terminate the program."""
-    print(f"Error: {message}")
+    report_error(f"Error: {message}")
+
+log_error("Something went wrong!")
+
+# ⚡ NumPy Engine for generate_random_data / calculate_ratios 🧩
+# For millions of samples the list path spends all its time in Python-level loops. The NumPy engine
+# draws every pair in one batch and divides all pairs at once. Errors are not raised per element:
+# zero denominators and non-integer values are reported through boolean masks instead.
+# The draws come from the same Mersenne Twister stream as `random.randint`, so for the same
+# `random.seed(...)` both engines return exactly the same ratios.
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: only the "numpy" engine needs it
+    np = None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("❌ The 'numpy' engine needs NumPy (pip install numpy).")
+
+
+def generate_random_arrays(num_samples: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Draws `num_samples` pairs as two int64 arrays (numerators in 1..100, denominators in 0..100).
+    Mirrors `random.randint(1, 100), random.randint(0, 100)` word for word and advances the
+    `random` module state exactly as the list engine would.
+    """
+    _require_numpy()
+    version, internal_state, gauss_next = random.getstate()
+    start = {"bit_generator": "MT19937",
+             "state": {"key": np.array(internal_state[:-1], dtype=np.uint32), "pos": internal_state[-1]}}
+    bitgen = np.random.MT19937()
+    bitgen.state = start
+
+    # randint(a, b) keeps the top 7 bits of a 32-bit word and rejects values outside the range:
+    # >= 100 for the numerator slot, >= 101 for the denominator slot.
+    needed = 2 * num_samples
+    words = bitgen.random_raw(needed * 128 // 100 + 64) >> 25
+    while True:
+        candidates = np.flatnonzero(words <= 100)
+        accepted = np.ones(len(candidates), dtype=bool)
+        # A 100 is only valid in the denominator slot, so walk those rare words in order.
+        rejected = 0
+        for j in np.flatnonzero(words[candidates] == 100):
+            if (j - rejected) % 2 == 0:
+                accepted[j] = False
+                rejected += 1
+        taken = candidates[accepted]
+        if len(taken) >= needed:
+            break
+        words = np.concatenate([words, bitgen.random_raw(needed - len(taken) + 64) >> 25])
+
+    taken = taken[:needed]
+    values = words[taken].astype(np.int64)
+    numerators = values[0::2] + 1
+    denominators = values[1::2]
+
+    # Leave `random` exactly where the list engine would have left it.
+    bitgen.state = start
+    bitgen.random_raw(int(taken[-1]) + 1, output=False)
+    state = bitgen.state["state"]
+    random.setstate((version, tuple(state["key"].tolist()) + (int(state["pos"]),), gauss_next))
+    return numerators, denominators
+
+
+def calculate_ratios_vectorized(data) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Divides all pairs at once and returns (ratios, zero_mask, type_mask).
+    `data` is either the (numerators, denominators) arrays from `generate_random_arrays`
+    or a regular list of pairs. Ratios at masked positions are 0.0.
+    """
+    _require_numpy()
+    if isinstance(data, PairArray):
+        data = data.to_numpy()
+    if isinstance(data, tuple) and len(data) == 2 and isinstance(data[0], np.ndarray):
+        numerators, denominators = data
+        if numerators.dtype.kind in "iub" and denominators.dtype.kind in "iub":
+            type_mask = np.zeros(len(numerators), dtype=bool)
+        else:
+            type_mask = np.array([not (isinstance(a, (int, np.integer)) and isinstance(b, (int, np.integer)))
+                                  for a, b in zip(numerators.tolist(), denominators.tolist())], dtype=bool)
+    else:
+        type_mask = np.fromiter((not (isinstance(a, int) and isinstance(b, int)) for a, b in data),
+                                dtype=bool, count=len(data))
+        numerators = np.array([a if ok else 0 for (a, _), ok in zip(data, ~type_mask)], dtype=np.int64)
+        denominators = np.array([b if ok else 1 for (_, b), ok in zip(data, ~type_mask)], dtype=np.int64)
+
+    numerators = np.where(type_mask, 0, numerators).astype(np.float64)
+    denominators = np.where(type_mask, 1, denominators).astype(np.float64)
+    zero_mask = (denominators == 0) & ~type_mask
+    ratios = np.divide(numerators, denominators, out=np.zeros(len(numerators)), where=~(zero_mask | type_mask))
+    return ratios, zero_mask, type_mask
+
+
+def ratios_from_vectorized(data) -> List[float]:
+    """Same contract as the list engine: raises on the first bad pair, otherwise returns all ratios."""
+    try:
+        ratios, zero_mask, type_mask = calculate_ratios_vectorized(data)
+    except (TypeError, ValueError):  # some item isn't a pair: find it and raise like the list engine
+        codes = classify_pairs(data)
+        i = first_error(codes)
+        raise_for_code(codes[i], i, data[i])
+        raise
+    bad = zero_mask | type_mask
+    if bad.any():
+        i = int(bad.argmax())
+        if type_mask[i]:
+            raise TypeError(f"❌ Data at index {i} is not composed of integers.")
+        num1 = data[0][i] if isinstance(data, tuple) else data[i][0]
+        raise ZeroDivisionError(f"❌ Cannot divide {num1} by zero at index {i}.")
+    return ratios.tolist()
+
+
+# Both engines give identical results for the same seed
+if np is not None:
+    random.seed(7)
+    list_pairs = generate_random_data(5)
+    random.seed(7)
+    numerators, denominators = generate_random_data(5, engine="numpy")
+    print("List pairs: ", list_pairs)
+    print("NumPy pairs:", list(zip(numerators.tolist(), denominators.tolist())))
+
+    random.seed(2)  # seed 2 draws no zero denominator in 20 pairs, so there are ratios to compare
+    list_ratios = process_data(20)
+    random.seed(2)
+    numpy_ratios = process_data(20, engine="numpy")
+    print("Same ratios from both engines:", len(list_ratios) == 20 and list_ratios == numpy_ratios)
+
+
+# 🌊 Streaming Mode for process_data 🧩
+# `process_data` builds every pair and every ratio before returning anything. The streaming mode
+# chains three lazy generators (generator -> validator -> divider) and hands out ratios in chunks,
+# so memory stays at one chunk no matter how large `num_samples` is and the first chunk is ready
+# right away. The pairs are drawn in the same order as the list engine, so for the same seed the
+# chunks join up to the same list that `process_data` returns.
+from itertools import chain, islice
+from typing import Iterable, Iterator
+
+
+def iter_random_pairs(num_samples: int) -> Iterator[Tuple[int, int]]:
+    """Lazily yields `num_samples` random pairs, one at a time."""
+    for _ in range(num_samples):
+        yield random.randint(1, 100), random.randint(0, 100)
+
+
+def validate_pairs(pairs: Iterable[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+    """Passes pairs through, raising TypeError / ZeroDivisionError on the first bad one."""
+    for i, (num1, num2) in enumerate(pairs):
+        if not isinstance(num1, int) or not isinstance(num2, int):
+            raise TypeError(f"❌ Data at index {i} is not composed of integers.")
+        if num2 == 0:
+            raise ZeroDivisionError(f"❌ Cannot divide {num1} by zero at index {i}.")
+        yield num1, num2
+
+
+def divide_pairs(pairs: Iterable[Tuple[int, int]]) -> Iterator[float]:
+    """Lazily yields the ratio of each (already validated) pair."""
+    for num1, num2 in pairs:
+        yield num1 / num2
+
+
+def process_data_stream(num_samples: int, chunk_size: int = 1000) -> Iterator[List[float]]:
+    """
+    Streaming version of `process_data`: yields lists of at most `chunk_size` ratios.
+    On the first bad pair the ratios before it are still yielded, then the stream stops.
+    """
+    if not isinstance(num_samples, int) or num_samples <= 0:
+        report_error("[ValueError] ❌ 'num_samples' must be a positive integer.")
+        return
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        report_error("[ValueError] ❌ 'chunk_size' must be a positive integer.")
+        return
+
+    ratios = divide_pairs(validate_pairs(iter_random_pairs(num_samples)))
+    chunk: List[float] = []
+    try:
+        while True:
+            chunk.extend(islice(ratios, chunk_size - len(chunk)))
+            if not chunk:
+                return
+            yield chunk
+            chunk = []
+    except (ZeroDivisionError, TypeError) as e:
+        report_error(f"[{type(e).__name__}] {e}")
+        if chunk:
+            yield chunk
+        report_error("🚫 Stream stopped at the first invalid pair.")
+
+
+# Chunks arrive one by one and join up to the same result as process_data
+random.seed(7)
+streamed = []
+for chunk in process_data_stream(5, chunk_size=2):
+    print("📦 Chunk:", chunk)
+    streamed.extend(chunk)
+random.seed(7)
+print("Same as process_data:", streamed == process_data(5))
+
+
+# 🚀 Multi-core Sharded process_data 🧩
+# `process_data` runs on one core. The parallel mode splits `num_samples` into shards and runs
+# each shard -- the pairs `generate_random_data` would draw, then their ratios -- in a process pool.
+# Every shard seeds its own RNG stream from (seed, shard index), so the merged result depends only
+# on the seed and the shard count -- never on how many workers ran it or in what order they finished.
+# The shard code is `run_shard` in ratio_shards.py, and the pool comes from process_pool.py (which
+# explains why it forks). With workers=1, or where the platform can't fork, the same `run_shard`
+# runs in this process.
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from process_pool import pool_context
+from ratio_shards import run_shard
+
+
+def shard_sizes(num_samples: int, shards: int) -> List[int]:
+    """Splits `num_samples` into `shards` near-equal parts (the first ones get the remainder)."""
+    base, extra = divmod(num_samples, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+def process_data_parallel(num_samples: int, seed: int = 0, shards: Optional[int] = None,
+                          workers: Optional[int] = None, engine: str = "list") -> List[float]:
+    """
+    Sharded version of `process_data`. Results are merged in shard order and are bit-identical
+    for a given (seed, shards) pair. Returns [] if any shard fails, like `process_data`.
+    """
+    try:
+        if not isinstance(num_samples, int) or num_samples <= 0:
+            raise ValueError("❌ 'num_samples' must be a positive integer.")
+        if shards is None:
+            shards = os.cpu_count() or 1
+        if not isinstance(shards, int) or shards <= 0:
+            raise ValueError("❌ 'shards' must be a positive integer.")
+        if engine not in ENGINES:
+            raise ValueError(f"❌ Unknown engine {engine!r} (use one of {ENGINES}).")
+    except ValueError as ve:
+        report_error(f"[ValueError] {ve}")
+        return []
+
+    shards = min(shards, num_samples)
+    jobs = [(seed, i, size, engine) for i, size in enumerate(shard_sizes(num_samples, shards))]
+    context = pool_context()
+    if workers == 1 or context is None:
+        outcomes = [run_shard(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            outcomes = list(pool.map(run_shard, jobs))
+
+    shard_results = []
+    for ratios, error in outcomes:
+        if error:
+            report_error(error)
+        shard_results.append(ratios)
+    if not all(shard_results):
+        report_error("🚫 At least one shard failed.")
+        return []
+    return [ratio for shard in shard_results for ratio in shard]
+
+
+# Same seed and shard count -> same ratios, whether it runs in a pool or in this process
+pooled = process_data_parallel(12, seed=3, shards=4)
+in_process = process_data_parallel(12, seed=3, shards=4, workers=1)
+print("Sharded ratios:", pooled)
+print("Pool and single-process runs match:", pooled == in_process)
+print("With the NumPy engine too:", process_data_parallel(12, seed=3, shards=4, engine="numpy") == in_process)
+random.seed("3-0")  # a single shard draws exactly what process_data draws after this seed
+print("One shard matches process_data:", process_data_parallel(12, seed=3, shards=1) == process_data(12))
+
+
+# 🩹 Partial-Failure Results for calculate_ratios 🧩
+# By default one zero denominator throws away the whole batch. With partial=True the good ratios
+# are kept and each bad pair only adds one entry to a compact failure record: its index and an
+# error-kind code, stored in typed arrays rather than exception objects.
+from array import array
+from typing import NamedTuple
+
+
+class RatioResult(NamedTuple):
+    ratios: List[float]       # ratios of the valid pairs, in input order
+    failed_indices: array     # array('L') of input indices that failed
+    error_kinds: array        # array('B') of ERROR_* codes, aligned with failed_indices
+
+
+def empty_ratio_result() -> RatioResult:
+    """What partial mode returns when there is nothing to divide at all."""
+    return RatioResult([], array("L"), array("B"))
+
+
+def calculate_ratios_partial(data, engine: str = "list") -> RatioResult:
+    """Computes every ratio it can and records the failed pairs instead of giving up."""
+    if engine == "numpy":
+        try:
+            ratios, zero_mask, type_mask = calculate_ratios_vectorized(data)
+        except (TypeError, ValueError):
+            pass  # some item isn't a pair: the vectorized path can't unpack it, classify one by one below
+        else:
+            bad = zero_mask | type_mask
+            failed = np.flatnonzero(bad)
+            kinds = np.where(type_mask[failed], ERROR_TYPE, ERROR_ZERO_DIVISION)
+            return RatioResult(ratios[~bad].tolist(), array("L", failed.tolist()), array("B", kinds.tolist()))
+    if engine not in ENGINES:
+        raise ValueError(f"❌ Unknown engine {engine!r} (use one of {ENGINES}).")
+
+    codes = classify_pairs(data)
+    failed_indices = array("L", (i for i, code in enumerate(codes) if code != ERROR_OK))
+    error_kinds = array("B", (codes[i] for i in failed_indices))
+    ratios = [num1 / num2 for num1, num2 in compress(data, [code == ERROR_OK for code in codes])]
+    return RatioResult(ratios, failed_indices, error_kinds)
+
+
+# One zero denominator no longer costs the whole batch
+random.seed(1)
+print("Default mode:", process_data(50))
+random.seed(1)
+result = process_data(50, partial=True)
+print(f"Partial mode: {len(result.ratios)} ratios kept, failures:",
+      [(i, ERROR_NAMES[kind]) for i, kind in zip(result.failed_indices, result.error_kinds)])
+print(calculate_ratios([(1, 2), (3, 0), ("4", 2), (9, 3), (5,)], partial=True))
+
+
+# 📋 Precomputed Ratio Table 🧩
+# Pairs from `generate_random_data` always lie in 1..100 x 0..100, so only about 10k different
+# ratios can ever occur. A RatioTable computes them once into a flat list: the ratio of (a, b) sits
+# at index (a - num_low) * den_span + (b - den_low), and a zero-denominator slot holds None, so the
+# same single lookup gives the ratio and tells whether the pair is valid, folding the list engine's
+# two passes (classify_pairs, then divide) into one. It is still not faster: in CPython the index
+# arithmetic and range checks cost more than the float division they replace, and the table engine
+# measures about 0.8x the list engine (see benchmark_ratio_table). A PairArray and integer NumPy
+# arrays skip the table entirely, because their C-level division paths are faster than any lookup.
+import timeit
+
+
+class RatioTable:
+    """Flat ratio table for every pair in num_low..num_high x den_low..den_high."""
+
+    def __init__(self, num_low: int = 1, num_high: int = 100, den_low: int = 0, den_high: int = 100):
+        self.num_low, self.num_high = num_low, num_high
+        self.den_low, self.den_high = den_low, den_high
+        self.den_span = den_high - den_low + 1
+        self._base = num_low * self.den_span + den_low   # index of (a, b) is a * den_span + b - _base
+        self.flat: List[Optional[float]] = [a / b if b != 0 else None
+                                            for a in range(num_low, num_high + 1)
+                                            for b in range(den_low, den_high + 1)]
+
+    def lookup(self, num1: int, num2: int) -> float:
+        """Scalar lookup; falls back to `num1 / num2` (and its errors) outside the table."""
+        if (isinstance(num1, int) and isinstance(num2, int)
+                and self.num_low <= num1 <= self.num_high and self.den_low <= num2 <= self.den_high):
+            ratio = self.flat[num1 * self.den_span + num2 - self._base]
+            if ratio is not None:
+                return ratio
+        return num1 / num2
+
+    def gather(self, data: List[Tuple[int, int]]) -> List[Optional[float]]:
+        """
+        Looks up every pair in one pass. None marks a pair the table can't answer (zero
+        denominator or out of range); a value that isn't an int raises TypeError (a float in
+        range makes a float index).
+        """
+        flat, span, base = self.flat, self.den_span, self._base
+        num_low, num_high, den_low, den_high = self.num_low, self.num_high, self.den_low, self.den_high
+        return [flat[num1 * span + num2 - base] if num_low <= num1 <= num_high and den_low <= num2 <= den_high
+                else None
+                for num1, num2 in data]
+
+
+DEFAULT_RATIO_TABLE = RatioTable()
+
+
+def ratios_from_table(data, table: Optional[RatioTable] = None) -> List[float]:
+    """Table-backed `calculate_ratios`: raises on the first bad pair, otherwise returns all ratios."""
+    table = table or DEFAULT_RATIO_TABLE
+    if isinstance(data, tuple) and len(data) == 2 and np is not None and isinstance(data[0], np.ndarray):
+        return ratios_from_vectorized(data)  # one np.divide beats any table gather
+
+    try:
+        ratios = table.gather(data)
+    except (TypeError, ValueError):  # a non-int or a malformed pair: classified below
+        ratios = None
+    if ratios is not None and None not in ratios:
+        return ratios
+
+    # Something needs a closer look: report it exactly like the list engine would ...
+    codes = classify_pairs(data)
+    i = first_error(codes)
+    if i < len(codes):
+        raise_for_code(codes[i], i, data[i])
+    # ... or, if every pair is fine after all, some were just outside the table.
+    return [table.lookup(num1, num2) for num1, num2 in data]
+
+
+def benchmark_ratio_table(num_samples: int = 200_000, repeats: int = 3) -> None:
+    """Times the list engine against the table engine on a list of tuples."""
+    random.seed(0)
+    data = [(random.randint(1, 100), random.randint(1, 100)) for _ in range(num_samples)]
+    list_time = min(timeit.repeat(lambda: calculate_ratios(data), number=1, repeat=repeats))
+    table_time = min(timeit.repeat(lambda: calculate_ratios(data, "table"), number=1, repeat=repeats))
+    print(f"⏱ list {list_time * 1000:8.2f} ms   table {table_time * 1000:8.2f} ms"
+          f"   speedup x{list_time / table_time:.2f}")
+
+
+print(DEFAULT_RATIO_TABLE.lookup(3, 4), DEFAULT_RATIO_TABLE.lookup(300, 4))  # table hit, fallback
+print(calculate_ratios([(1, 2), (250, 5), (7, 0)], engine="table"))
+print(calculate_ratios([(2.0, 4)], engine="table"))  # rejected like the list engine: not integers
+if np is not None:  # integer arrays are divided directly, so narrow dtypes like uint8 can't wrap
+    print(calculate_ratios(PairArray.from_pairs([(100, 100), (3, 4)]).to_numpy(), engine="table"))
+# benchmark_ratio_table()  # Uncomment to time it (200k pairs, several repeats)
+
+
+# 🚦 Exception-free Validation Fast Path 🧩
+# Raising and catching an exception costs far more than an `if`. When many inputs are bad, a
+# per-element try/except spends most of its time unwinding. `classify_pairs` (defined next to
+# `calculate_ratios`) checks every pair up front and returns ERROR_* codes instead; the exception
+# API stays available as a thin wrapper that raises once, from the code.
+
+def divide_with_code(a, b) -> Tuple[float, int]:
+    """Exception-free division: returns (result, ERROR_OK) or (0.0, ERROR_TYPE / ERROR_ZERO_DIVISION)."""
+    if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+        return 0.0, ERROR_TYPE
+    if b == 0:
+        return 0.0, ERROR_ZERO_DIVISION
+    return a / b, ERROR_OK
+
+
+def checked_divide(a, b) -> float:
+    """Exception API on top of `divide_with_code`: raises TypeError / ZeroDivisionError like a / b."""
+    result, code = divide_with_code(a, b)
+    if code == ERROR_TYPE:
+        raise TypeError("❌ Both inputs must be numbers!")
+    if code == ERROR_ZERO_DIVISION:
+        raise ZeroDivisionError("❌ Cannot divide by zero!")
+    return result
+
+
+def make_pairs_with_errors(num_samples: int, error_rate: float, seed: int = 0) -> List[Tuple[int, int]]:
+    """Random pairs where roughly `error_rate` of the denominators are zero."""
+    rng = random.Random(seed)
+    return [(rng.randint(1, 100), 0 if rng.random() < error_rate else rng.randint(1, 100))
+            for _ in range(num_samples)]
+
+
+def ratios_try_except(data: List[Tuple[int, int]]) -> Tuple[List[float], int]:
+    """Per-element try/except: keeps the good ratios and counts the failures."""
+    ratios, failures = [], 0
+    for num1, num2 in data:
+        try:
+            if not isinstance(num1, int) or not isinstance(num2, int):
+                raise TypeError("Input data must be integers.")
+            ratios.append(num1 / num2)
+        except (TypeError, ZeroDivisionError):
+            failures += 1
+    return ratios, failures
+
+
+def ratios_precheck(data: List[Tuple[int, int]]) -> Tuple[List[float], int]:
+    """Same result as `ratios_try_except`, but classifies first and never raises."""
+    codes = classify_pairs(data)
+    if first_error(codes) == len(codes):
+        return [num1 / num2 for num1, num2 in data], 0
+    ratios = [num1 / num2 for (num1, num2), code in zip(data, codes) if code == ERROR_OK]
+    return ratios, len(data) - len(ratios)
+
+
+def benchmark_error_handling(num_samples: int = 100_000, error_rates=(0.0, 0.01, 0.1, 0.25, 0.5),
+                             repeats: int = 3) -> None:
+    """Prints throughput (million pairs/s) of the try/except path vs the pre-check path."""
+    print(f"{'errors':>7} {'try/except':>12} {'pre-check':>12}")
+    for rate in error_rates:
+        data = make_pairs_with_errors(num_samples, rate)
+        assert ratios_try_except(data) == ratios_precheck(data)
+        try_time = min(timeit.repeat(lambda: ratios_try_except(data), number=1, repeat=repeats))
+        check_time = min(timeit.repeat(lambda: ratios_precheck(data), number=1, repeat=repeats))
+        print(f"{rate:>7.0%} {num_samples / try_time / 1e6:>10.2f}M/s {num_samples / check_time / 1e6:>10.2f}M/s")
+
+
+print(divide_with_code(10, 0), divide_with_code(10, "abc"), checked_divide(10, 4))
+print(classify_pairs([(1, 2), (3, 0), ("4", 2)]))
+# benchmark_error_handling()  # Uncomment to time it
+
+
+# 🪶 Cheap Validation Errors 🧩
+# TooYoungError, NegativeNumberError and NegativeDenominatorError now share the ValidationError
+# base defined with check_age. Their message lives in `args` only (no second `self.message` copy
+# and no __init__ override), so creating one is as cheap as creating a plain Exception.
+
+def benchmark_validation_errors(iterations: int = 100_000) -> None:
+    """Prints the cost per raise+catch of the old classes vs ValidationError."""
+
+    class OldNegativeNumberError(Exception):  # the class as it was defined before
+        def __init__(self, message="Division by a negative number is not allowed!"):
+            self.message = message
+            super().__init__(self.message)
+
+    def raise_old():
+        try:
+            raise OldNegativeNumberError()
+        except OldNegativeNumberError:
+            pass
+
+    def raise_new():
+        try:
+            raise NegativeDenominatorError()
+        except NegativeNumberError:
+            pass
+
+    for name, func in (("old class", raise_old), ("ValidationError", raise_new)):
+        seconds = min(timeit.repeat(func, number=iterations, repeat=3))
+        print(f"⏱ {name:<16} {seconds / iterations * 1e9:7.1f} ns per raise")
+
+
+try:
+    raise TooYoungError()
+except ValidationError as e:
+    print(f"{type(e).__name__}: {e}")
+print(str(TooYoungError(42)))  # a non-string message is still printable
+# benchmark_validation_errors()  # Uncomment to time it
+
+
+# 🗂️ Batch Validation for check_age-style Rules 🧩
+# `check_age` validates one age at a time, prints two lines and raises TooYoungError for every bad
+# record. For an import of hundreds of thousands of records the batch validator below evaluates
+# each rule once over the whole array of ages and returns a status code per record plus summary
+# counts -- no prints and no exceptions per record. Rules are pluggable: each one is just a code,
+# the ValidationError class it stands for, and a vectorized "which records fail" function.
+from typing import Callable, Dict, Sequence
+
+STATUS_OK = 0
+
+
+class BatchRule(NamedTuple):
+    code: int                          # status code written for records failing this rule (1..255)
+    error: type                        # the ValidationError subclass the rule stands for
+    fails: Callable[["np.ndarray"], "np.ndarray"]   # values -> boolean mask of failing records
+
+
+class BatchReport(NamedTuple):
+    status: "np.ndarray"               # uint8 status code per record (STATUS_OK or a rule code)
+    counts: Dict[int, int]             # number of records per status code
+    names: Dict[int, str]              # status code -> "OK" or the error class name
+
+
+def _check_code(code: int) -> int:
+    # Codes are stored in a uint8 array, and 0 is STATUS_OK.
+    if not isinstance(code, int) or not STATUS_OK < code <= 255:
+        raise ValueError(f"❌ Rule code must be an integer from 1 to 255, got {code!r}.")
+    return code
+
+
+def positive_rule(code: int = 1) -> BatchRule:
+    """Batch version of `check_positive`."""
+    return BatchRule(_check_code(code), NegativeNumberError, lambda values: values < 0)
+
+
+def min_age_rule(min_age: int = 18, code: int = 2) -> BatchRule:
+    """Batch version of `check_age`."""
+    return BatchRule(_check_code(code), TooYoungError, lambda ages: ages < min_age)
+
+
+def validate_batch(values: Sequence[float], rules: Sequence[BatchRule]) -> BatchReport:
+    """Applies every rule to all records at once. When several rules fail, the first one listed wins."""
+    _require_numpy()
+    codes = [_check_code(rule.code) for rule in rules]
+    if len(set(codes)) != len(codes):
+        raise ValueError("❌ Every rule needs its own code.")
+    values = np.asarray(values)
+    status = np.full(len(values), STATUS_OK, dtype=np.uint8)
+    for rule in reversed(rules):
+        status[rule.fails(values)] = rule.code
+
+    tally = np.bincount(status, minlength=max([STATUS_OK, *codes]) + 1)
+    counts = {STATUS_OK: int(tally[STATUS_OK])}
+    names = {STATUS_OK: "OK"}
+    for rule in rules:
+        counts[rule.code] = int(tally[rule.code])
+        names[rule.code] = rule.error.__name__
+    return BatchReport(status, counts, names)
+
+
+def validate_ages(ages: Sequence[float], min_age: int = 18) -> BatchReport:
+    """Batch `check_age`: negative ages are reported as NegativeNumberError, under-age as TooYoungError."""
+    return validate_batch(ages, (positive_rule(), min_age_rule(min_age)))
+
+
+if np is not None:
+    report = validate_ages([16, 21, -3, 18, 40])
+    print("Status codes:", report.status.tolist())
+    print("Summary:", {report.names[code]: count for code, count in report.counts.items()})
+
+
+# 📥 Buffered Error Sink 🧩
+# Every error line from the data pipeline goes through `report_error`, and `log_error` does too.
+# By default that is a plain print. Under a high error rate those synchronous stdout writes
+# dominate the runtime (and can block on a slow pipe). An ErrorSink makes the hot path cheap:
+# `emit` only records the message in an in-memory ring buffer (repeats just bump a counter), and
+# a background thread flushes the buffer in one write, rate-limited to `max_lines_per_second`.
+import sys
+import threading
+import time
+from collections import deque
+
+
+class ErrorSink:
+    """Collects error lines in memory and writes them out in deduplicated, rate-limited batches."""
+
+    def __init__(self, write: Optional[Callable[[str], object]] = None, capacity: int = 1024,
+                 max_lines_per_second: float = 100.0, flush_interval: float = 0.5, background: bool = True):
+        self.write = write or sys.stdout.write
+        self.capacity = capacity
+        self.max_lines_per_second = max_lines_per_second
+        self.dropped = 0      # messages evicted from a full buffer
+        self.suppressed = 0   # lines held back by the rate limit
+        self.write_errors = 0  # flushes whose write() raised (their lines are lost)
+        self._pending = deque()               # ring buffer of distinct messages, oldest first
+        self._counts: Dict[str, int] = {}     # message -> times seen since the last flush
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # The bucket holds at least one token, so below 1 line/s the fractions still add up to a line.
+        self._bucket_size = max(1.0, max_lines_per_second)
+        self._tokens = self._bucket_size
+        self._last_refill = time.monotonic()
+        self._pid = os.getpid()
+        self._stop = threading.Event()
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, args=(flush_interval,),
+                                            name="error-sink-flusher", daemon=True)
+            self._thread.start()
+
+    def emit(self, message: str) -> None:
+        """Hot path: record the message and return. Nothing is written here."""
+        if os.getpid() != self._pid:  # forked pool worker: the flusher thread did not come along
+            self.write(message + "\n")
+            return
+        with self._lock:
+            count = self._counts.get(message)
+            if count is not None:
+                self._counts[message] = count + 1
+                return
+            if len(self._pending) >= self.capacity:
+                self.dropped += self._counts.pop(self._pending.popleft())
+            self._pending.append(message)
+            self._counts[message] = 1
+
+    def flush(self) -> None:
+        """Writes everything collected so far as one block, within the rate limit."""
+        with self._flush_lock:
+            with self._lock:
+                pending, counts = self._pending, self._counts
+                self._pending, self._counts = deque(), {}
+            if not pending:
+                return
+
+            now = time.monotonic()
+            self._tokens = min(self._bucket_size,
+                               self._tokens + (now - self._last_refill) * self.max_lines_per_second)
+            self._last_refill = now
+            allowed = min(len(pending), int(self._tokens))
+            self._tokens -= allowed
+
+            lines = []
+            for message in islice(pending, allowed):
+                count = counts[message]
+                lines.append(message if count == 1 else f"{message} (x{count})")
+            held_back = sum(counts[message] for message in islice(pending, allowed, None))
+            if held_back:
+                self.suppressed += held_back
+                lines.append(f"... {held_back} more error line(s) suppressed by the rate limit")
+            try:
+                self.write("\n".join(lines) + "\n")
+            except Exception:
+                # A broken writer must not kill the flusher thread: count it and keep going.
+                self.write_errors += 1
+
+    def close(self) -> None:
+        """Stops the flusher thread and writes whatever is left."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self, flush_interval: float) -> None:
+        while not self._stop.wait(flush_interval):
+            self.flush()
+
+    def __enter__(self) -> "ErrorSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# A burst of failing runs: repeated lines are counted, and the rest is cut off by the rate limit
+error_sink = ErrorSink(max_lines_per_second=5, flush_interval=0.1)
+log_error("Something went wrong!")
+random.seed(1)
+for _ in range(200):
+    process_data(40)
+error_sink.close()
+error_sink = None
+
+
+# 📄 Bulk Mode for safe_divide 🧩
+# `safe_divide` asks for two numbers with `input()`, which is fine for a person but useless for a
+# bulk job. `bulk_divide` reads "numerator denominator" pairs (space- or comma-separated), one per
+# line, from a file or a stdin pipe. It parses and divides them a batch of lines at a time and
+# writes one output line per input line: the result, or the same ValueError / ZeroDivisionError
+# message safe_divide would print. Only one batch is in memory at a time, so the input can be much
+# larger than RAM.
+import io
+import tempfile
+from typing import TextIO, Union
+
+
+def bulk_divide(source: Union[str, TextIO, None] = None, output: Optional[TextIO] = None,
+                batch_size: int = 10_000) -> Tuple[int, int]:
+    """
+    Divides every pair in `source` (a path, an open text file, or sys.stdin by default) and writes
+    the results to `output` (sys.stdout by default). Returns (successful lines, failed lines).
+    """
+    output = output or sys.stdout
+    if source is None:
+        source = sys.stdin
+    if isinstance(source, str):
+        with open(source, "r", buffering=1 << 20) as file:
+            return bulk_divide(file, output, batch_size)
+
+    ok = failed = 0
+    line_no = 0
+    while True:
+        batch = list(islice(source, batch_size))
+        if not batch:
+            return ok, failed
+        results = []
+        for line in batch:
+            line_no += 1
+            fields = line.replace(",", " ").split()
+            if not fields:
+                continue  # blank lines are skipped, but still counted in the line numbers
+            try:
+                if len(fields) != 2:
+                    raise ValueError(f"expected 2 numbers, got {len(fields)}")
+                num1, num2 = float(fields[0]), float(fields[1])
+                if num2 == 0:
+                    raise ZeroDivisionError("float division by zero")
+            except ValueError:
+                failed += 1
+                results.append(f"line {line_no}: 🚫 Invalid input! Please enter numeric values only.")
+            except ZeroDivisionError:
+                failed += 1
+                results.append(f"line {line_no}: ❌ Cannot divide by zero.")
+            else:
+                ok += 1
+                results.append(f"{num1} / {num2} = {num1 / num2}")
+        output.write("\n".join(results) + "\n" if results else "")
+
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    pairs_path = os.path.join(tmp_dir, "pairs.txt")
+    with open(pairs_path, "w") as file:
+        file.write("10 2\n7,0\nabc 3\n\n9 4\n")
+    print("Bulk summary (ok, failed):", bulk_divide(pairs_path, batch_size=2))
+print(bulk_divide(io.StringIO("1 4\n"), output=io.StringIO()))  # any text stream works, e.g. sys.stdin
+
+
+# 🧱 Compact Pair Storage 🧩
+# A list of (int, int) tuples costs a list slot plus a 56-byte tuple per pair, for values that fit
+# in a single byte. `PairArray` (defined next to `generate_random_data`) keeps the same pairs in two
+# array('B') columns -- 2 bytes per pair. Every engine of `calculate_ratios` accepts it directly,
+# and with engine="compact" `generate_random_data` / `process_data` produce one.
+
+def generate_compact_pairs(num_samples: int) -> PairArray:
+    """Same pairs as the list engine for the same seed, stored in a PairArray."""
+    if np is not None:
+        numerators, denominators = generate_random_arrays(num_samples)
+        return PairArray(numerators.astype(np.uint8).tobytes(), denominators.astype(np.uint8).tobytes())
+    # Draw in the list engine's order (numerator, denominator, numerator, ...) without building tuples.
+    flat = array("B", (random.randint(low, high) for _ in range(num_samples) for low, high in ((1, 100), (0, 100))))
+    return PairArray(flat[0::2], flat[1::2])
+
+
+random.seed(7)
+compact = generate_random_data(100_000, engine="compact")
+random.seed(7)
+pairs = generate_random_data(100_000)
+list_bytes = sys.getsizeof(pairs) + sum(sys.getsizeof(pair) for pair in pairs)
+print(compact, f"vs list of tuples: {list_bytes} bytes ({list_bytes / compact.nbytes:.0f}x more)")
+print("Same pairs:", compact == pairs, "| first pairs:", compact[:3].tolist())
+print(calculate_ratios(PairArray.from_pairs([(1, 2), (9, 3)])), calculate_ratios(compact[:50], partial=True).failed_indices)
+
+
+# 🎲 Batched Random Numbers 🧩
+# `generate_random_data` calls `random.randint` twice per sample. `RandomService` (random_service.py,
+# shared with lesson11.py) draws whole batches at once and gives every thread its own seeded
+# generator, so threads generating data don't share the one global `random` generator.
+from random_service import RandomService, benchmark_random_service
+
+
+def generate_random_data_batched(num_samples: int, service: Optional[RandomService] = None) -> List[Tuple[int, int]]:
+    """Same shape as `generate_random_data`, but both columns are drawn in one batch each."""
+    if not isinstance(num_samples, int) or num_samples <= 0:
+        report_error("[ValueError] ❌ 'num_samples' must be a positive integer.")
+        return []
+    service = service or RandomService()
+    return list(zip(service.ints(1, 100, num_samples), service.ints(0, 100, num_samples)))
+
+
+service = RandomService(seed=42)
+print("Batched pairs:", generate_random_data_batched(5, service))
+print("One at a time:", service.randint(1, 100), service.random())
+# benchmark_random_service()  # Uncomment to time it (or run: python random_service.py)
+
+
+# 📈 Online Statistics over process_data 🧩
+# Often we only want summary numbers of the ratios (mean, variance, min/max, percentiles). Keeping
+# the full ratio list just to scan it again costs memory proportional to `num_samples`.
+# `OnlineStats` is fed chunk by chunk (e.g. from `process_data_stream`): mean and variance are
+# updated in one pass (Welford / Chan), and quantiles come from a log-bucket sketch (DDSketch-style)
+# with a bounded number of buckets and a fixed relative error. Two OnlineStats merge exactly, so
+# each shard of a parallel run can summarize its own ratios and only the summaries are combined.
+import math
+from collections import Counter
+
+
+class OnlineStats:
+    """Constant-memory running mean / variance / min / max / approximate quantiles."""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0                  # sum of squared deviations from the mean
+        self.min = math.inf
+        self.max = -math.inf
+        self.zeros = 0
+        self._positive = Counter()      # bucket index -> count, for x > 0
+        self._negative = Counter()      # bucket index of -x -> count, for x < 0
+
+    def update(self, values: Iterable[float]) -> "OnlineStats":
+        """Adds a chunk of values. Only the chunk itself is held in memory, never the history."""
+        values = values if isinstance(values, list) else list(values)
+        if not values:
+            return self
+        chunk = OnlineStats(self.relative_accuracy, self.max_buckets)
+        chunk.count = len(values)
+        chunk.mean = math.fsum(values) / chunk.count
+        chunk._m2 = math.fsum((x - chunk.mean) ** 2 for x in values)
+        chunk.min, chunk.max = min(values), max(values)
+        log, log_gamma = math.log, self._log_gamma
+        chunk._positive.update(math.ceil(log(x) / log_gamma) for x in values if x > 0)
+        chunk._negative.update(math.ceil(log(-x) / log_gamma) for x in values if x < 0)
+        chunk.zeros = chunk.count - sum(chunk._positive.values()) - sum(chunk._negative.values())
+        return self.merge(chunk)
+
+    def merge(self, other: "OnlineStats") -> "OnlineStats":
+        """Folds `other` (e.g. another shard's summary) into this one."""
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self._m2 += other._m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        self.zeros += other.zeros
+        self._positive.update(other._positive)
+        self._negative.update(other._negative)
+        self._collapse()
+        return self
+
+    def _collapse(self) -> None:
+        # Keep memory constant: fold the smallest-magnitude buckets together (they matter least
+        # for relative error) until the sketch fits in max_buckets.
+        for buckets in (self._positive, self._negative):
+            while len(buckets) > self.max_buckets // 2:
+                lowest = min(buckets)
+                count = buckets.pop(lowest)
+                buckets[min(buckets)] += count
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (n - 1 in the denominator)."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile (0 <= q <= 1), within `relative_accuracy` of the true value."""
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self._negative, reverse=True):
+            seen += self._negative[index]
+            if seen > rank:
+                return max(self.min, -2 * self.gamma ** index / (self.gamma + 1))
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for index in sorted(self._positive):
+            seen += self._positive[index]
+            if seen > rank:
+                return min(self.max, 2 * self.gamma ** index / (self.gamma + 1))
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {"count": self.count, "mean": self.mean, "variance": self.variance, "min": self.min,
+                "max": self.max, "p50": self.quantile(0.5), "p90": self.quantile(0.9), "p99": self.quantile(0.99)}
+
+
+def process_data_stats(num_samples: int, chunk_size: int = 10_000, partial: bool = False) -> OnlineStats:
+    """
+    Summary statistics of `process_data`'s ratios without ever holding more than one chunk.
+    Like `process_data`, one bad pair fails the whole run: an empty OnlineStats (count 0) is
+    returned rather than a summary of the ratios before it. With partial=True bad pairs are
+    skipped, as in `calculate_ratios(..., partial=True)`, and the rest are summarized.
+    """
+    stats = OnlineStats()
+    if partial:
+        if not isinstance(num_samples, int) or num_samples <= 0:
+            report_error("[ValueError] ❌ 'num_samples' must be a positive integer.")
+            return stats
+        pairs = iter_random_pairs(num_samples)
+        skipped = 0
+        while True:
+            chunk = list(islice(pairs, chunk_size))
+            if not chunk:
+                break
+            result = calculate_ratios_partial(chunk)
+            stats.update(result.ratios)
+            skipped += len(result.failed_indices)
+        if skipped:
+            report_error(f"⚠️ {skipped} of {num_samples} pairs skipped.")
+        return stats
+
+    for chunk in process_data_stream(num_samples, chunk_size):
+        stats.update(chunk)
+    if stats.count < num_samples:  # the stream stopped at a bad pair: don't summarize a fragment
+        report_error("🚫 Ratio calculation failed.")
+        return OnlineStats()
+    return stats
+
+
+# Shards summarize independently; merging gives the same numbers as one pass over all ratios
+random.seed(11)
+shard_a = process_data_stats(60, chunk_size=16)
+random.seed(12)
+shard_b = process_data_stats(60, chunk_size=16)
+merged = OnlineStats().merge(shard_a).merge(shard_b)
+random.seed(11)
+all_ratios = list(chain.from_iterable(process_data_stream(60)))
+random.seed(12)
+all_ratios += list(chain.from_iterable(process_data_stream(60)))
+print({key: round(value, 4) for key, value in merged.summary().items()})
+print("Exact mean:", round(math.fsum(all_ratios) / len(all_ratios), 4),
+      "| exact median:", round(sorted(all_ratios)[(len(all_ratios) - 1) // 2], 4))
+
+# A zero denominator fails the run (count 0), unless partial=True skips the bad pairs
+random.seed(1)
+print("Failed run:", process_data_stats(10_000).count)
+random.seed(1)
+print("Partial run:", process_data_stats(10_000, partial=True).count)
+
+
+# 💾 Binary Columnar Files with Memory-mapped Reload 🧩
+# Printing millions of ratios is slow and rounds them. `save_columns` writes each column (e.g.
+# numerators, denominators, ratios) as raw typed values after a small header (format version,
+# sample count, seed and one entry per column with its name -- at most 16 characters -- typecode
+# and length). `ColumnFile` reopens such a file with mmap: every column is a memoryview (or NumPy
+# array) straight onto the mapped file, so nothing is parsed or copied until it is actually read.
+import mmap
+import struct
+
+COLUMN_MAGIC = b"L9COLS"
+COLUMN_VERSION = 2
+_FILE_HEADER = struct.Struct("<6sHQq?H")   # magic, version, sample count, seed, has seed, column count
+_COLUMN_ENTRY = struct.Struct("<16sc7xQ")  # name, array typecode, padding, length
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+def save_columns(path: str, columns: Dict[str, array], count: int, seed: Optional[int] = None) -> None:
+    """Writes typed `array` columns to `path` in the columnar format (8-byte aligned)."""
+    names = {name: name.encode("ascii") for name in columns}
+    for name, encoded in names.items():
+        if len(encoded) > 16:  # the entry holds 16 bytes; a longer name would come back cut off
+            raise ValueError(f"❌ Column name {name!r} is longer than 16 characters.")
+    if seed is not None and not -2 ** 63 <= seed < 2 ** 63:
+        raise ValueError("❌ 'seed' must fit in a signed 64-bit integer.")
+    offset = _aligned(_FILE_HEADER.size + _COLUMN_ENTRY.size * len(columns))
+    with open(path, "wb") as file:
+        file.write(_FILE_HEADER.pack(COLUMN_MAGIC, COLUMN_VERSION, count, seed or 0, seed is not None, len(columns)))
+        for name, values in columns.items():
+            file.write(_COLUMN_ENTRY.pack(names[name], values.typecode.encode("ascii"), len(values)))
+        for values in columns.values():
+            file.write(b"\0" * (offset - file.tell()))
+            values.tofile(file)
+            offset = _aligned(file.tell())
+
+
+def save_results(path: str, pairs, ratios: List[float], seed: Optional[int] = None) -> None:
+    """Stores generated pairs and their ratios (from any engine) in one columnar file."""
+    if not isinstance(pairs, PairArray):
+        pairs = PairArray.from_pairs(pairs)
+    save_columns(path, {"numerators": pairs.numerators, "denominators": pairs.denominators,
+                        "ratios": array("d", ratios)}, count=len(pairs), seed=seed)
+
+
+class ColumnFile:
+    """A columnar file opened with mmap; columns are zero-copy views of the mapped bytes."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, seed, has_seed, num_columns = _FILE_HEADER.unpack_from(self._map, 0)
+        if magic != COLUMN_MAGIC or version != COLUMN_VERSION:
+            self.close()
+            raise ValueError(f"❌ '{path}' is not a column file this code can read.")
+        self.seed = seed if has_seed else None
+        self._layout: Dict[str, Tuple[str, int, int]] = {}   # name -> (typecode, offset, length)
+        offset = _aligned(_FILE_HEADER.size + _COLUMN_ENTRY.size * num_columns)
+        for i in range(num_columns):
+            name, typecode, length = _COLUMN_ENTRY.unpack_from(self._map, _FILE_HEADER.size + i * _COLUMN_ENTRY.size)
+            typecode = typecode.decode("ascii")
+            self._layout[name.rstrip(b"\0").decode("ascii")] = (typecode, offset, length)
+            offset = _aligned(offset + length * array(typecode).itemsize)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._layout)
+
+    def __getitem__(self, name: str) -> memoryview:
+        """Zero-copy typed view of one column. Release views before calling close()."""
+        typecode, offset, length = self._layout[name]
+        return memoryview(self._map)[offset:offset + length * array(typecode).itemsize].cast(typecode)
+
+    def numpy(self, name: str):
+        """Zero-copy, read-only NumPy array of one column."""
+        _require_numpy()
+        typecode, offset, length = self._layout[name]
+        return np.frombuffer(self._map, dtype=typecode, count=length, offset=offset)
+
+    def pairs(self) -> PairArray:
+        return PairArray(self["numerators"], self["denominators"])
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "ColumnFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    results_path = os.path.join(tmp_dir, "results.l9c")
+    random.seed(3)
+    pairs = generate_random_data(1000, engine="compact")
+    result = calculate_ratios(pairs, partial=True)
+    save_results(results_path, pairs, result.ratios, seed=3)
+    print("File size:", os.path.getsize(results_path), "bytes")
+
+    with ColumnFile(results_path) as columns:
+        ratios_view = columns["ratios"]
+        print(columns.names, "| samples:", columns.count, "| seed:", columns.seed)
+        print("Ratios match exactly:", ratios_view.tolist() == result.ratios, "| pairs match:", columns.pairs() == pairs)
+        ratios_view.release()
+
+
+# 🧯 Memory Budget with Spill-to-Disk 🧩
+# `process_data(num_samples)` keeps allocating until the machine swaps. `process_data_budgeted`
+# runs the same streaming pipeline, but checks a MemoryBudget after every chunk. Once the budget is
+# exceeded, the ratios collected so far are spilled to a temporary binary chunk file and dropped
+# from memory. The returned SpilledRatios streams the chunks back in order, so the final values are
+# identical to `process_data` for the same seed. Memory is measured by sampling the process RSS
+# once per chunk. method="tracemalloc" counts Python allocations exactly instead, but tracing every
+# allocation slows the pipeline down about 5x, so only ask for it when you need that precision.
+import tracemalloc
+
+
+class MemoryBudget:
+    """A memory limit in bytes, measured by sampling the process RSS (or with tracemalloc)."""
+
+    def __init__(self, limit_bytes: int, method: str = "rss"):
+        if method not in ("tracemalloc", "rss"):
+            raise ValueError("❌ method must be 'tracemalloc' or 'rss'.")
+        self.limit_bytes = limit_bytes
+        self.method = method
+        self._started_tracing = False
+
+    def __enter__(self) -> "MemoryBudget":
+        if self.method == "tracemalloc" and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def used(self) -> int:
+        if self.method == "tracemalloc":
+            return tracemalloc.get_traced_memory()[0]
+        try:
+            with open("/proc/self/statm") as statm:  # Linux: current resident pages
+                return int(statm.read().split()[1]) * mmap.PAGESIZE
+        except OSError:
+            import resource  # elsewhere: peak RSS (KiB on Linux/BSD, bytes on macOS) is the best we get
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+
+    def exceeded(self) -> bool:
+        return self.used() > self.limit_bytes
+
+
+class SpilledRatios:
+    """Ratios held partly in temporary chunk files and partly in memory, read back in order."""
+
+    def __init__(self, read_size: int = 65_536):
+        self.read_size = read_size
+        self._dir = tempfile.TemporaryDirectory(prefix="ratios-")
+        self._files: List[Tuple[str, int]] = []   # (path, number of ratios) per spilled chunk
+        self._memory = array("d")
+        self.spilled = 0
+
+    def extend(self, ratios: Iterable[float]) -> None:
+        self._memory.extend(ratios)
+
+    def spill(self) -> None:
+        """Moves everything held in memory into a new chunk file."""
+        if not self._memory:
+            return
+        path = os.path.join(self._dir.name, f"chunk-{len(self._files):05d}.bin")
+        with open(path, "wb") as file:
+            self._memory.tofile(file)
+        self._files.append((path, len(self._memory)))
+        self.spilled += len(self._memory)
+        self._memory = array("d")
+
+    def __len__(self) -> int:
+        return self.spilled + len(self._memory)
+
+    def __iter__(self) -> Iterator[float]:
+        for path, length in self._files:
+            with open(path, "rb") as file:
+                while length:
+                    block = array("d")
+                    block.fromfile(file, min(self.read_size, length))
+                    length -= len(block)
+                    yield from block
+        yield from self._memory
+
+    def tolist(self) -> List[float]:
+        return list(self)
+
+    def close(self) -> None:
+        self._dir.cleanup()
+
+
+def process_data_budgeted(num_samples: int, memory_budget: int = 256 * 1024 * 1024,
+                          chunk_size: int = 10_000, method: str = "rss"):
+    """
+    `process_data` with a memory limit: returns a SpilledRatios (close() it when done), or []
+    on failure just like `process_data`.
+    """
+    if not isinstance(num_samples, int) or num_samples <= 0:
+        report_error("[ValueError] ❌ 'num_samples' must be a positive integer.")
+        return []
+
+    ratios = SpilledRatios()
+    with MemoryBudget(memory_budget, method) as budget:
+        for chunk in process_data_stream(num_samples, chunk_size):
+            ratios.extend(chunk)
+            del chunk
+            if budget.exceeded():
+                ratios.spill()
+
+    if len(ratios) != num_samples:  # the stream stopped at a bad pair
+        ratios.close()
+        report_error("🚫 Ratio calculation failed.")
+        return []
+    return ratios
+
 
-log_error("Something went wrong!")
\ No newline at end of file
+# A tiny budget forces spills; the streamed-back result is identical to process_data
+random.seed(7)
+expected = process_data(5)
+random.seed(7)
+spilled = process_data_budgeted(5, memory_budget=1, chunk_size=2)
+print(f"{len(spilled)} ratios, {spilled.spilled} spilled to disk | identical:", spilled.tolist() == expected)
+spilled.close()
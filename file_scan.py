@@ -0,0 +1,150 @@
+# file_scan.py
+# The scanning engine behind lesson#10.py's "Scanning big files on every core" section.
+
+# scan_file() memory-maps a file, splits it into ranges that start and end on a newline, runs a
+# kernel on each range in a process pool and merges the partial results. The kernels work on big
+# blocks with bytes.count()/mmap.find() (and NumPy for the histogram, if installed), so no Python
+# object is created per line.
+#   'lines'     - number of lines (like len(file.readlines()))
+#   'grep'      - number of lines containing a byte pattern, plus the offsets of the first matches
+#   'histogram' - how often each of the 256 byte values occurs
+# The pool comes from process_pool.py; where the platform can't fork, or with workers=1, the
+# ranges are scanned in this process.
+#
+#   count_lines('big.log')
+#   grep_file('big.log', 'ERROR')       # -> (matching lines, offsets of the first ones)
+#   byte_histogram('big.log')
+
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from process_pool import pool_context
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: without it the histogram counts each byte value separately
+    np = None
+
+SCAN_BLOCK = 4 * 1024 * 1024
+
+
+def newline_ranges(mm, parts):
+    """Splits the mapped file into about `parts` (start, end) ranges that end just after a newline."""
+    size = len(mm)
+    bounds = [0]
+    for i in range(1, parts):
+        cut = max(size * i // parts, bounds[-1])
+        newline = mm.find(b'\n', cut)
+        cut = size if newline == -1 else newline + 1
+        if cut >= size:
+            break
+        if cut > bounds[-1]:
+            bounds.append(cut)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _count_lines(mm, start, end, arg):
+    count = 0
+    for pos in range(start, end, SCAN_BLOCK):
+        count += mm[pos:min(pos + SCAN_BLOCK, end)].count(b'\n')
+    return count
+
+
+def _grep(mm, start, end, arg):
+    pattern, max_offsets = arg
+    count, offsets = 0, []
+    pos = mm.find(pattern, start, end)
+    while pos != -1:
+        line_start = max(mm.rfind(b'\n', start, pos) + 1, start)
+        line_end = mm.find(b'\n', pos, end)
+        count += 1
+        if len(offsets) < max_offsets:
+            offsets.append(line_start)
+        if line_end == -1:
+            break
+        pos = mm.find(pattern, line_end + 1, end)
+    return count, offsets
+
+
+def _byte_histogram(mm, start, end, arg):
+    if np is not None:
+        return np.bincount(np.frombuffer(mm, np.uint8, end - start, start), minlength=256).tolist()
+    histogram = [0] * 256
+    for pos in range(start, end, SCAN_BLOCK):
+        block = mm[pos:min(pos + SCAN_BLOCK, end)]
+        for value in set(block):
+            histogram[value] += block.count(value)
+    return histogram
+
+
+def _merge_grep(parts):
+    count = sum(part[0] for part in parts)
+    offsets = [offset for part in parts for offset in part[1]]
+    return count, offsets
+
+
+SCAN_KERNELS = {
+    'lines': (_count_lines, sum),
+    'grep': (_grep, _merge_grep),
+    'histogram': (_byte_histogram, lambda parts: [sum(column) for column in zip(*parts)]),
+}
+
+
+def _scan_range(job):
+    """Runs one kernel over one range of the file: (path, kernel, start, end, arg) -> partial result."""
+    path, kernel, start, end, arg = job
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return SCAN_KERNELS[kernel][0](mm, start, end, arg)
+
+
+def _scan_empty(kernel):
+    return {'lines': 0, 'grep': (0, []), 'histogram': [0] * 256}[kernel]
+
+
+def scan_file(path, kernel, arg=None, workers=None, parts=None):
+    """Runs a SCAN_KERNELS kernel over the whole file in a process pool and merges the results."""
+    if kernel not in SCAN_KERNELS:
+        raise ValueError(f"unknown kernel {kernel!r}, expected one of {sorted(SCAN_KERNELS)}")
+    if kernel == 'grep':
+        if not (isinstance(arg, tuple) and len(arg) == 2):
+            raise ValueError(f"grep needs arg=(pattern, max_offsets), got {arg!r}")
+        if not arg[0]:
+            raise ValueError("pattern must not be empty")  # it would "match" once more than there are lines
+    workers = workers or os.cpu_count() or 1
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return _scan_empty(kernel)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ranges = newline_ranges(mm, parts or workers)
+            ends_with_newline = mm[-1:] == b'\n'
+
+    jobs = [(path, kernel, start, end, arg) for start, end in ranges]
+    context = pool_context()
+    if workers == 1 or len(jobs) == 1 or context is None:
+        parts = [_scan_range(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            parts = list(pool.map(_scan_range, jobs))
+    result = SCAN_KERNELS[kernel][1](parts)
+    if kernel == 'lines' and not ends_with_newline:
+        result += 1  # the last line has no '\n' but is still a line
+    if kernel == 'grep':
+        result = (result[0], result[1][:arg[1]])  # every range kept up to max_offsets
+    return result
+
+
+def count_lines(path, workers=None):
+    return scan_file(path, 'lines', workers=workers)
+
+
+def grep_file(path, pattern, max_offsets=100, workers=None):
+    """Counts the lines containing `pattern`; also returns the byte offsets of the first matching lines."""
+    if isinstance(pattern, str):
+        pattern = pattern.encode('utf-8')
+    return scan_file(path, 'grep', (pattern, max_offsets), workers=workers)
+
+
+def byte_histogram(path, workers=None):
+    return scan_file(path, 'histogram', workers=workers)
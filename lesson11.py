@@ -71,6 +71,16 @@ print(random.randint(1, 100))  # Random integer between 1 and 100
 
 # Generate a random floating-point number
 print(random.random())  # Random float between 0.0 and 1.0
+
+# Need lots of random numbers? Calling random.randint() once per number is slow, and all threads
+# share one global generator. random_service.py hands them out in batches instead, with its own
+# seeded generator for every thread:
+from random_service import RandomService
+
+service = RandomService(seed=42)
+print(service.ints(1, 100, 5))  # 5 random integers between 1 and 100, in one call
+print(service.floats(3))        # 3 random floats between 0.0 and 1.0
+print(service.randint(1, 100))  # same as random.randint(1, 100), served from a buffer
 # 2. Date and Time with Python
 # Python’s datetime module allows you to work with dates and times in a variety of ways.
 
@@ -0,0 +1,26 @@
+# process_pool.py
+# How the lessons start process pools (Lesson9.py's process_data_parallel, lesson#10.py's scan_file).
+
+# A pool worker has to be a function in a module the child can import, which is why the workers
+# live in ratio_shards.py and file_scan.py rather than in the lesson scripts. That alone is not
+# enough: the 'spawn' and 'forkserver' start methods also re-run the parent's main script in every
+# child. For a lesson that means replaying the whole lesson -- its input() calls, its demos, and any
+# pools the demos start while the child is still bootstrapping. A forked child starts as a copy of
+# the parent instead, so `pool_context()` picks 'fork' wherever the platform has it, and returns
+# None elsewhere so the caller runs the work in its own process.
+#
+#   context = pool_context()
+#   if context is None:
+#       results = [work(job) for job in jobs]
+#   else:
+#       with ProcessPoolExecutor(mp_context=context) as pool:
+#           results = list(pool.map(work, jobs))
+
+import multiprocessing
+
+
+def pool_context():
+    """The 'fork' multiprocessing context, or None if this platform can't fork."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
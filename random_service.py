@@ -0,0 +1,143 @@
+# random_service.py
+# A batched random-number service shared by the lessons (Lesson9.py, lesson11.py).
+
+# `random.randint` / `random.random` do a full Python call per number, and every thread shares the
+# one global generator. RandomService hands numbers out of pre-filled buffers instead, keeps an
+# independent seeded generator per thread (and per process), and can jump ahead to give parallel
+# workers non-overlapping streams.
+#
+#   service = RandomService(seed=42)
+#   service.randint(1, 100)         # one number, served from a buffer
+#   service.ints(1, 100, 1000)      # a whole batch in one call
+#   service.stream(3)               # generator for parallel stream number 3
+#   service.use_stream(3)           # this thread draws from stream 3: reproducible per worker
+
+import os
+import random
+import threading
+import timeit
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: without it streams are separately seeded random.Random objects
+    np = None
+
+# Bumped in every forked child, so per-thread state copied from the parent is noticed cheaply.
+_fork_generation = 0
+
+
+def _after_fork_in_child() -> None:
+    global _fork_generation
+    _fork_generation += 1
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class _ThreadState:
+    """The generator and number buffers owned by one thread."""
+    __slots__ = ("generator", "generation", "int_buffers", "float_buffer")
+
+    def __init__(self, generator, generation: int):
+        self.generator = generator
+        self.generation = generation
+        self.int_buffers: Dict[Tuple[int, int], List[int]] = {}
+        self.float_buffer: List[float] = []
+
+
+class RandomService:
+    """Buffered random numbers with one independent generator per thread."""
+
+    def __init__(self, seed: Optional[int] = None, buffer_size: int = 4096):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.buffer_size = buffer_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._next_stream = 0
+        self._pid = os.getpid()
+
+    def stream(self, index: int, salt: Optional[int] = None):
+        """
+        Generator for stream `index`. With NumPy, stream i is the seeded MT19937 jumped ahead
+        i * 2**128 steps, so streams never overlap; without it each stream gets its own seed.
+        A `salt` (e.g. a worker's pid) selects a different family of streams for the same seed.
+        """
+        seed = self.seed if salt is None else [self.seed, salt]
+        if np is not None:
+            return np.random.Generator(np.random.MT19937(seed).jumped(index))
+        return random.Random(f"{seed}-{index}")
+
+    def ints(self, low: int, high: int, count: int) -> List[int]:
+        """`count` random integers in low..high (inclusive), drawn in one batch."""
+        generator = self._state().generator
+        if np is not None:
+            return generator.integers(low, high + 1, size=count).tolist()
+        return generator.choices(range(low, high + 1), k=count)
+
+    def floats(self, count: int) -> List[float]:
+        """`count` random floats in [0.0, 1.0), drawn in one batch."""
+        generator = self._state().generator
+        if np is not None:
+            return generator.random(count).tolist()
+        return [generator.random() for _ in range(count)]
+
+    def randint(self, low: int, high: int) -> int:
+        """Drop-in for `random.randint`, served from a per-thread buffer."""
+        # Hot path: one thread-local lookup and one dict lookup per number.
+        state = getattr(self._local, "state", None)
+        if state is None or state.generation != _fork_generation:
+            state = self._state()
+        buffer = state.int_buffers.get((low, high))
+        if not buffer:
+            buffer = state.int_buffers[low, high] = self.ints(low, high, self.buffer_size)
+        return buffer.pop()
+
+    def random(self) -> float:
+        """Drop-in for `random.random`, served from a per-thread buffer."""
+        state = getattr(self._local, "state", None)
+        if state is None or state.generation != _fork_generation:
+            state = self._state()
+        buffer = state.float_buffer
+        if not buffer:
+            buffer.extend(self.floats(self.buffer_size))
+        return buffer.pop()
+
+    def use_stream(self, index: int) -> None:
+        """
+        Pins the calling thread to stream `index` (dropping its buffered numbers). Without this,
+        threads take stream numbers in the order they first ask and forked children salt theirs
+        with their pid, which is never overlapping but not reproducible. A worker that calls
+        use_stream(worker_number) gets the same numbers for the same seed on every run.
+        """
+        self._local.state = _ThreadState(self.stream(index), _fork_generation)
+
+    def _state(self) -> _ThreadState:
+        state = getattr(self._local, "state", None)
+        if state is None or state.generation != _fork_generation:
+            # Threads take stream numbers in the order they first ask for a number. A forked child
+            # salts its streams with its pid, so it never replays a stream of its parent.
+            with self._lock:
+                index = self._next_stream
+                self._next_stream += 1
+            pid = os.getpid()
+            salt = None if pid == self._pid else pid
+            state = _ThreadState(self.stream(index, salt), _fork_generation)
+            self._local.state = state
+        return state
+
+
+def benchmark_random_service(count: int = 1_000_000, repeats: int = 3) -> None:
+    """Prints the time for `count` integers: per-call random.randint vs the service."""
+    service = RandomService(seed=0)
+    per_call = min(timeit.repeat(lambda: [random.randint(1, 100) for _ in range(count)], number=1, repeat=repeats))
+    buffered = min(timeit.repeat(lambda: [service.randint(1, 100) for _ in range(count)], number=1, repeat=repeats))
+    batch = min(timeit.repeat(lambda: service.ints(1, 100, count), number=1, repeat=repeats))
+    print(f"⏱ random.randint     : {per_call * 1000:8.1f} ms")
+    print(f"⏱ service.randint    : {buffered * 1000:8.1f} ms   x{per_call / buffered:.1f}")
+    print(f"⏱ service.ints(batch): {batch * 1000:8.1f} ms   x{per_call / batch:.1f}")
+
+
+if __name__ == "__main__":
+    benchmark_random_service()
@@ -0,0 +1,46 @@
+# ratio_shards.py
+# One shard of Lesson9.py's process_data_parallel: draw the shard's pairs, then divide them.
+
+# process_data_parallel runs `run_shard` both in a process pool and (with workers=1) in its own
+# process, so the two paths always run the same code. It lives here because pool workers must be
+# importable (see process_pool.py).
+#
+#   run_shard((seed, shard index, shard size, engine))   # -> (ratios, error message or None)
+
+import random
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: without it the "numpy" engine divides in plain Python
+    np = None
+
+
+def shard_pairs(seed: int, index: int, size: int) -> List[Tuple[int, int]]:
+    """
+    The shard's pairs: exactly what `generate_random_data(size)` returns after
+    random.seed(f"{seed}-{index}"), drawn from a private generator so the global one is untouched.
+    """
+    rng = random.Random(f"{seed}-{index}")  # string seeds are hashed with SHA-512: stable across processes
+    return [(rng.randint(1, 100), rng.randint(0, 100)) for _ in range(size)]
+
+
+def divide_shard(pairs: List[Tuple[int, int]], engine: str) -> Tuple[List[float], Optional[str]]:
+    """
+    Divides the pairs: (ratios, None), or ([], message) at the first zero denominator. The
+    engines of Lesson9.py all give identical ratios; here "numpy" divides in one vectorized step
+    and every other engine uses the list code.
+    """
+    for i, (num1, num2) in enumerate(pairs):
+        if num2 == 0:
+            return [], f"[ZeroDivisionError] ❌ Cannot divide {num1} by zero at index {i}."
+    if engine == "numpy" and np is not None and pairs:
+        values = np.array(pairs, dtype=np.float64)
+        return (values[:, 0] / values[:, 1]).tolist(), None
+    return [num1 / num2 for num1, num2 in pairs], None
+
+
+def run_shard(job: Tuple[int, int, int, str]) -> Tuple[List[float], Optional[str]]:
+    """Runs one shard: (seed, shard index, shard size, engine) -> (ratios, error message or None)."""
+    seed, index, size, engine = job
+    return divide_shard(shard_pairs(seed, index, size), engine)